@@ -1,75 +1,214 @@
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
+import numexpr as ne
+import pyarrow.feather as feather
 from bokeh.plotting import figure
 from bokeh.models import ColumnDataSource, HoverTool, ColorBar, LinearColorMapper
 from bokeh.transform import cumsum
 from math import pi
 
-# Load dataset
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Explicit schema so the Arrow CSV reader skips type inference: numeric lab
+# values as float32 and every string column as category, halving the bytes
+# each boolean mask and plot payload has to move.
+CSV_DTYPES = {
+    "Patient_ID": "int32",
+    "Age": "float32",
+    "TSH_Level": "float32",
+    "T3_Level": "float32",
+    "T4_Level": "float32",
+    "Nodule_Size": "float32",
+    "Gender": "category",
+    "Country": "category",
+    "Ethnicity": "category",
+    "Family_History": "category",
+    "Radiation_Exposure": "category",
+    "Iodine_Deficiency": "category",
+    "Smoking": "category",
+    "Obesity": "category",
+    "Diabetes": "category",
+    "Thyroid_Cancer_Risk": "category",
+    "Diagnosis": "category",
+}
+
+NUMERIC_COLS = ["Age", "TSH_Level", "T3_Level", "T4_Level", "Nodule_Size"]
+
+SUMMARY_COLS = ["Age", "Gender", "Country", "Thyroid_Cancer_Risk", "Diagnosis",
+                "TSH_Level", "T3_Level", "T4_Level", "Nodule_Size"]
+
+CSV_PATH = "thyroid_cancer_risk_data.csv"
+FEATHER_PATH = "thyroid_cancer_risk_data.feather"
+
+# Load dataset. The first cold start parses the CSV and persists the typed
+# frame as Arrow Feather; later cold starts memory-map the Feather file and
+# skip parsing entirely.
 @st.cache_data
 def load_data():
-    df = pd.read_csv("thyroid_cancer_risk_data.csv")
+    if os.path.exists(FEATHER_PATH):
+        return feather.read_table(FEATHER_PATH, memory_map=True).to_pandas()
+    df = pd.read_csv(CSV_PATH, engine="pyarrow", dtype=CSV_DTYPES)
+    feather.write_feather(df, FEATHER_PATH, compression="lz4")
     return df
 
 df = load_data()
 
+# Single-pass counter over category codes (-1 = NaN, skipped). With Numba
+# installed this compiles to one tight loop over the int8 codes, which
+# stays cheap however many categories a column grows; without it,
+# np.bincount does the same job with one extra pass for the NaN mask.
+if njit is not None:
+    @njit(cache=True)
+    def count_codes(codes, n):
+        out = np.zeros(n, np.int64)
+        for c in codes:
+            if c >= 0:
+                out[c] += 1
+        return out
+else:
+    def count_codes(codes, n):
+        return np.bincount(codes[codes >= 0], minlength=n)
+
+# Raw arrays the filter expression runs over: Age values plus the int8
+# category codes for Gender and Country, extracted once
+@st.cache_resource
+def filter_arrays():
+    return {
+        "age": df["Age"].to_numpy(),
+        "gender": df["Gender"].cat.codes.to_numpy(),
+        "country": df["Country"].cat.codes.to_numpy(),
+    }
+
+# Row ids matching the sidebar filters: NumExpr fuses all conditions into
+# a single multithreaded pass producing one boolean mask, instead of one
+# mask and one intermediate copy per condition. Memoized on the widget
+# values so reruns that only touch the metric, bin or heatmap widgets
+# skip the scan entirely.
+@st.cache_data(max_entries=32)
+def filter_ids(age_lo, age_hi, gender, country):
+    arrays = filter_arrays()
+    expr = "(age >= lo) & (age <= hi)"
+    local = {"age": arrays["age"], "lo": age_lo, "hi": age_hi}
+    if gender != "All":
+        expr += " & (gcodes == gc)"
+        local["gcodes"] = arrays["gender"]
+        local["gc"] = df["Gender"].cat.categories.get_loc(gender)
+    if country != "All":
+        expr += " & (ccodes == cc)"
+        local["ccodes"] = arrays["country"]
+        local["cc"] = df["Country"].cat.categories.get_loc(country)
+    mask = ne.evaluate(expr, local_dict=local)
+    return np.flatnonzero(mask).astype(np.int32)
+
+# Full correlation matrix over all numeric columns for the current filter,
+# cached on the widget state — changing the heatmap column selection then
+# only slices the cached matrix instead of recomputing correlations
+@st.cache_data
+def full_corr(age_lo, age_hi, gender, country):
+    sub = df[NUMERIC_COLS].take(filter_ids(age_lo, age_hi, gender, country))
+    arr = sub.dropna().to_numpy(dtype=np.float32, copy=False)
+    corr = np.corrcoef(arr, rowvar=False).round(2).astype("float32")
+    return pd.DataFrame(corr, index=NUMERIC_COLS, columns=NUMERIC_COLS)
+
 st.title("📊 Thyroid Cancer Risk Interactive Dashboard")
 
+# Sorted option list for a column, computed once per dataset instead of
+# rescanning the column on every rerun
+@st.cache_data
+def column_options(col):
+    return ("All",) + tuple(sorted(df[col].dropna().unique().tolist()))
+
 # Sidebar Filters
 st.sidebar.header("Filter Options")
 age_range = st.sidebar.slider("Select Age Range", 0, 100, (20, 60))
-gender_filter = st.sidebar.selectbox("Select Gender", ["All"] + sorted(df["Gender"].unique().tolist()))
-country_filter = st.sidebar.selectbox("Select Country", ["All"] + sorted(df["Country"].unique().tolist()))
+gender_filter = st.sidebar.selectbox("Select Gender", column_options("Gender"))
+country_filter = st.sidebar.selectbox("Select Country", column_options("Country"))
 y_metric = st.sidebar.selectbox("Y-Axis Metric", ["TSH_Level", "T3_Level", "T4_Level"])
 bin_count = st.sidebar.slider("Histogram Bin Count", 5, 30, 10)
 heatmap_cols = st.sidebar.multiselect(
     "Select Numeric Columns for Heatmap",
-    ["Age", "TSH_Level", "T3_Level", "T4_Level", "Nodule_Size"],
-    default=["Age", "TSH_Level", "T3_Level", "T4_Level", "Nodule_Size"]
+    NUMERIC_COLS,
+    default=NUMERIC_COLS
 )
 
-# Apply Filters
-filtered_df = df[(df["Age"] >= age_range[0]) & (df["Age"] <= age_range[1])]
-if gender_filter != "All":
-    filtered_df = filtered_df[filtered_df["Gender"] == gender_filter]
-if country_filter != "All":
-    filtered_df = filtered_df[filtered_df["Country"] == country_filter]
+# Apply Filters — compute the matching row ids once; each chart below takes
+# only the columns it actually needs through this array, so no full-width
+# filtered copy of the frame is ever materialized
+ids = filter_ids(age_range[0], age_range[1], gender_filter, country_filter)
 
 # --- Scatter Plot ---
+# Only the columns the glyph and hover tooltips reference, capped at
+# MAX_POINTS rows — past that the scatter is visually saturated anyway and
+# serializing every row just slows the websocket and the canvas.
+SCATTER_COLS = ["Nodule_Size", "TSH_Level", "T3_Level", "T4_Level",
+                "Age", "Gender", "Thyroid_Cancer_Risk", "Diagnosis"]
+MAX_POINTS = 20_000
+
+# Figure, glyph and hover built once and reused; reruns only swap out
+# source.data. The y field is the fixed name 'y' so switching the metric
+# doesn't need a new glyph.
+@st.cache_resource
+def scatter_fig():
+    src = ColumnDataSource({**{c: [] for c in SCATTER_COLS}, "y": []})
+    p = figure(title="Nodule Size vs Lab Metric",
+               x_axis_label='Nodule Size (cm)',
+               tools="pan,wheel_zoom,box_zoom,reset,hover",
+               width=700, height=450,
+               output_backend="webgl")
+
+    p.scatter(x='Nodule_Size', y='y', source=src, marker="circle",
+              size=7, fill_color="navy", fill_alpha=0.6, line_color=None,
+              legend_field="Thyroid_Cancer_Risk")
+
+    hover = p.select(dict(type=HoverTool))
+    hover.tooltips = [
+        ("Age", "@Age"),
+        ("Gender", "@Gender"),
+        ("Risk", "@Thyroid_Cancer_Risk"),
+        ("Diagnosis", "@Diagnosis"),
+        ("T3", "@T3_Level"),
+        ("T4", "@T4_Level")
+    ]
+
+    p.legend.location = "top_left"
+    return p, src
+
 st.subheader("📈 Nodule Size vs Selected Lab Metric")
-source = ColumnDataSource(filtered_df)
-p = figure(title="Nodule Size vs " + y_metric,
-           x_axis_label='Nodule Size (cm)',
-           y_axis_label=y_metric,
-           tools="pan,wheel_zoom,box_zoom,reset,hover",
-           width=700, height=450)
-
-p.circle(x='Nodule_Size', y=y_metric, source=source,
-         size=7, color="navy", alpha=0.6, legend_field="Thyroid_Cancer_Risk")
-
-hover = p.select(dict(type=HoverTool))
-hover.tooltips = [
-    ("Age", "@Age"),
-    ("Gender", "@Gender"),
-    ("Risk", "@Thyroid_Cancer_Risk"),
-    ("Diagnosis", "@Diagnosis"),
-    ("T3", "@T3_Level"),
-    ("T4", "@T4_Level")
-]
-
-p.legend.location = "top_left"
+plot_df = df[SCATTER_COLS].take(ids)
+if len(plot_df) > MAX_POINTS:
+    plot_df = plot_df.sample(MAX_POINTS, random_state=0)
+p, source = scatter_fig()
+# Plain NumPy arrays instead of a DataFrame: the float32 columns serialize
+# as 4-byte binary buffers and the categoricals go out as plain strings
+source.data = {
+    **{c: (plot_df[c].astype(str).to_numpy() if plot_df[c].dtype == "category"
+           else plot_df[c].to_numpy())
+       for c in SCATTER_COLS},
+    "y": plot_df[y_metric].to_numpy(),
+}
+p.title.text = "Nodule Size vs " + y_metric
+p.yaxis.axis_label = y_metric
 st.bokeh_chart(p, use_container_width=True)
 
 # --- Bar Chart Risiko ---
 st.subheader("📊 Distribution of Thyroid Cancer Risk Levels")
-risk_counts = filtered_df["Thyroid_Cancer_Risk"].value_counts().sort_index()
+# One counting sweep over the int8 category codes instead of a hash-based
+# value_counts; categories are already lexically sorted
+risk_cats = list(df["Thyroid_Cancer_Risk"].cat.categories)
+risk_codes = df["Thyroid_Cancer_Risk"].cat.codes.to_numpy()[ids]
+risk_counts = count_codes(risk_codes, len(risk_cats))
 risk_source = ColumnDataSource(data=dict(
-    risk=risk_counts.index.tolist(),
-    count=risk_counts.values.tolist()
+    risk=risk_cats,
+    count=risk_counts.tolist()
 ))
 
-bar = figure(x_range=risk_counts.index.tolist(),
+bar = figure(x_range=risk_cats,
              title="Risk Category Distribution",
              x_axis_label="Risk Level", y_axis_label="Number of Cases",
              width=700, height=400,
@@ -81,8 +220,14 @@ bar.vbar(x='risk', top='count', width=0.6, source=risk_source,
 st.bokeh_chart(bar, use_container_width=True)
 
 # --- Histogram Age ---
+# Age spans the fixed 0-100 slider range, so the bin edges depend only on
+# the bin count — precompute them instead of re-deriving min/max each rerun
+@st.cache_data
+def age_bin_edges(n):
+    return np.linspace(0, 100, n + 1, dtype=np.float32)
+
 st.subheader("📉 Age Distribution of Filtered Patients")
-hist, edges = np.histogram(filtered_df["Age"], bins=bin_count)
+hist, edges = np.histogram(df["Age"].to_numpy()[ids], bins=age_bin_edges(bin_count))
 age_source = ColumnDataSource(data=dict(top=hist, left=edges[:-1], right=edges[1:]))
 
 hist_plot = figure(title="Age Histogram",
@@ -97,11 +242,17 @@ st.bokeh_chart(hist_plot, use_container_width=True)
 
 # --- Pie Chart Diagnosis ---
 st.subheader("🥧 Diagnosis Distribution (Pie Chart)")
-diag_counts = filtered_df["Diagnosis"].value_counts()
-diag_data = pd.DataFrame({'diagnosis': diag_counts.index, 'value': diag_counts.values})
-diag_data['angle'] = diag_data['value'] / diag_data['value'].sum() * 2 * pi
+diag_cats = list(df["Diagnosis"].cat.categories)
+diag_codes = df["Diagnosis"].cat.codes.to_numpy()[ids]
+diag_values = count_codes(diag_codes, len(diag_cats))
+diag_angles = diag_values / diag_values.sum() * 2 * pi
 colors = ["#c9d9d3", "#718dbf", "#e84d60", "#ddb7b1", "#a1dab4"]
-diag_data['color'] = colors[:len(diag_data)]
+diag_source = ColumnDataSource(data=dict(
+    diagnosis=diag_cats,
+    value=diag_values.tolist(),
+    angle=diag_angles.tolist(),
+    color=colors[:len(diag_cats)]
+))
 
 pie = figure(height=400, title="Diagnosis Distribution",
              toolbar_location="right",
@@ -112,7 +263,7 @@ pie.wedge(x=0, y=1, radius=0.4,
           start_angle=cumsum('angle', include_zero=True),
           end_angle=cumsum('angle'),
           line_color="white", fill_color='color',
-          legend_field='diagnosis', source=diag_data,
+          legend_field='diagnosis', source=diag_source,
           hover_fill_color="gold", hover_alpha=0.8)
 
 pie.axis.visible = False
@@ -124,10 +275,9 @@ st.bokeh_chart(pie, use_container_width=True)
 # --- Heatmap Korelasi ---
 st.subheader("📌 Correlation Heatmap (Numeric Features)")
 if len(heatmap_cols) >= 2:
-    corr = filtered_df[heatmap_cols].corr().round(2)
-    heatmap_data = pd.DataFrame([
-        (x, y, corr.loc[y, x]) for x in corr.columns for y in corr.columns
-    ], columns=["x", "y", "value"])
+    corr = full_corr(age_range[0], age_range[1], gender_filter,
+                     country_filter).loc[heatmap_cols, heatmap_cols]
+    heatmap_data = corr.stack().rename_axis(["y", "x"]).reset_index(name="value")
 
     heat_source = ColumnDataSource(heatmap_data)
     mapper = LinearColorMapper(palette="Viridis256", low=-1, high=1)
@@ -151,10 +301,7 @@ else:
 
 # --- Summary Table ---
 st.subheader("📋 Summary Table of Filtered Data")
-st.dataframe(filtered_df[[
-    "Age", "Gender", "Country", "Thyroid_Cancer_Risk", "Diagnosis",
-    "TSH_Level", "T3_Level", "T4_Level", "Nodule_Size"
-]].reset_index(drop=True))
+st.dataframe(df[SUMMARY_COLS].take(ids), use_container_width=True)
 
 # --- Footer ---
 st.markdown("---")